@@ -1,7 +1,10 @@
+import atexit
+import os
 from flask import Flask
 from routes.auth_routes import auth_bp
 from routes.camera_routes import camera_bp
 from routes.stream_routes import stream_bp
+from services.camera_state import active_cameras
 
 app = Flask(__name__)
 app.secret_key = 'SECRET@123'
@@ -10,5 +13,12 @@ app.register_blueprint(auth_bp)
 app.register_blueprint(camera_bp)
 app.register_blueprint(stream_bp)
 
+
+@atexit.register
+def close_active_cameras():
+    for camera in list(active_cameras.values()):
+        camera.close()
+
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000, threaded=True)
@@ -1,15 +1,46 @@
+import hmac
+import re
 from flask import Blueprint, render_template, request, redirect, url_for, session
-from utils.user_camera_utils import load_users, save_users
+from werkzeug.security import generate_password_hash, check_password_hash
+from utils.user_camera_utils import load_users, update_users
 
 auth_bp = Blueprint('auth', __name__)
 
+# Werkzeug hashes look like `method$salt$hash`, e.g. `scrypt:32768:8:1$<salt>$<hex digest>`.
+_HASH_PATTERN = re.compile(r'(scrypt:\d+:\d+:\d+|pbkdf2:\w+(:\d+)?)\$[^$]+\$[0-9a-f]+')
+# Checked against when the username is unknown, so that the response takes as long as for a known user.
+_DUMMY_HASH = generate_password_hash('')
+
+def _verify_password(users, username, password):
+    if username not in users:
+        check_password_hash(_DUMMY_HASH, password)
+        return False
+    stored = users[username]['password']
+    if _HASH_PATTERN.fullmatch(stored):
+        return check_password_hash(stored, password)
+    # Accounts registered before passwords were hashed still hold the plaintext; compare it in
+    # constant time and replace it with a hash on the first successful login.
+    if not hmac.compare_digest(stored.encode(), password.encode()):
+        return False
+    password_hash = generate_password_hash(password)
+
+    def upgrade(current_users):
+        user = current_users.get(username)
+        if user is None or user.get('password') != stored:
+            return False
+        user['password'] = password_hash
+        return True
+
+    update_users(upgrade)
+    return True
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         users = load_users()
-        if username in users and users[username]['password'] == password:
+        if _verify_password(users, username, password):
             session['logged_in'] = True
             session['username'] = username
             return redirect(url_for('camera.index'))
@@ -22,12 +53,16 @@ def register():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        users = load_users()
-        if username in users:
-            return render_template('register.html', error='Username already exists')
+        password_hash = generate_password_hash(password)
 
-        users[username] = {'password': password}
-        save_users(users)
+        def add_user(users):
+            if username in users:
+                return False
+            users[username] = {'password': password_hash}
+            return True
+
+        if not update_users(add_user):
+            return render_template('register.html', error='Username already exists')
         return redirect(url_for('auth.login'))
     return render_template('register.html')
 
@@ -1,7 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, session, Response, send_file
 import uuid
 import os
-import json
+import orjson
+from utils.json_utils import dump_json
+from services.camera_state import latest_stats
 from utils.user_camera_utils import (
     get_user_cameras, add_user_camera, delete_user_camera
 )
@@ -9,6 +11,27 @@ from utils.user_camera_utils import (
 camera_bp = Blueprint('camera', __name__)
 
 
+def _json_response(data):
+    """
+    Serializes `data` with orjson and wraps it in an `application/json` response.
+    """
+    return Response(orjson.dumps(data), mimetype='application/json')
+
+
+def _json_file_response(path, default):
+    """
+    Sends the JSON file at `path` as-is, or `default` serialized if the file does not exist.
+
+    The file is streamed with `send_file` instead of being parsed and re-serialized, and the
+    response is conditional (ETag / Last-Modified with `max-age=0`), so polling clients get an
+    empty 304 response while the file is unchanged.
+    """
+    try:
+        return send_file(os.path.abspath(path), mimetype='application/json', conditional=True, max_age=0)
+    except FileNotFoundError:
+        return _json_response(default)
+
+
 @camera_bp.route('/', methods=['GET', 'POST'])
 def index():
     """
@@ -50,9 +73,8 @@ def save_zones(cam_id):
     This function first ensures that a user is logged in and authorized to access the specified camera.
     For POST requests, it receives JSON data containing zone information, saves this data to a
     JSON file specific to the camera ID within the 'data' directory, and returns a success status.
-    For GET requests, it attempts to load existing zone data from the corresponding JSON file.
-    If the file exists, the zone data is returned as a JSON response. If the file is not found,
-    an empty JSON object for zones is returned.
+    For GET requests, it sends the corresponding JSON file as a conditional response.
+    If the file is not found, an empty JSON object for zones is returned.
     """
     if not session.get('logged_in'):
         return "Unauthorized", 401
@@ -66,15 +88,10 @@ def save_zones(cam_id):
 
     if request.method == 'POST':
         zones_data = request.get_json()
-        os.makedirs('data', exist_ok=True)
-        with open(zones_path, 'w') as f:
-            json.dump(zones_data, f, indent=4)
+        dump_json(zones_path, zones_data, atomic=True)
         return '', 200
     else:
-        if os.path.exists(zones_path):
-            with open(zones_path, 'r') as f:
-                return jsonify(json.load(f))
-        return jsonify({"zones": []})
+        return _json_file_response(zones_path, {"zones": []})
 
 
 @camera_bp.route('/stats/<cam_id>')
@@ -83,9 +100,11 @@ def stats(cam_id):
     Retrieves and serves statistical data for a given camera ID.
 
     This function verifies user login and authorization for the specified camera.
-    It attempts to load pre-calculated statistics from a JSON file named `stats_{cam_id}.json`
-    located in the 'data' directory. If the file is found, its content is returned as a JSON response.
-    In case the file does not exist (FileNotFoundError), an empty JSON object is returned,
+    It serves the latest statistics published in memory by the camera's `VideoCamera` instance,
+    falling back to the pre-calculated statistics file `stats_{cam_id}.json` located in the 'data'
+    directory when the camera is not running. Both are sent as conditional responses, so unchanged
+    statistics are answered with a 304.
+    In case neither exists, an empty JSON object is returned,
     indicating no statistics are available yet for that camera. Unauthorized access
     or non-existent camera IDs result in a 401 Unauthorized response.
     """
@@ -97,11 +116,14 @@ def stats(cam_id):
     if cam_id not in user_cameras_config:
         return "Unauthorized", 401
 
-    try:
-        with open(f'data/stats_{cam_id}.json') as f:
-            return jsonify(json.load(f))
-    except FileNotFoundError:
-        return jsonify({})
+    stats_data = latest_stats.get(cam_id)
+    if stats_data is not None:
+        response = _json_response(stats_data)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
+
+    return _json_file_response(f'data/stats_{cam_id}.json', {})
 
 
 @camera_bp.route('/delete_camera/<cam_id>', methods=['POST'])
@@ -111,21 +133,25 @@ def delete_camera(cam_id):
 
     This function handles POST requests to delete a camera specified by `cam_id`.
     It first ensures that the user is logged in and authorized. Upon successful deletion
-    of the camera from the user's configuration, it attempts to stop and remove
-    the active `VideoCamera` instance if it exists. Additionally, it removes any
-    corresponding zone and statistics JSON files from the 'data' directory.
+    of the camera from the user's configuration, it removes the active `VideoCamera`
+    instance if it exists and closes it in a background thread, so the response does not wait
+    for FFmpeg to exit. Additionally, it removes any corresponding zone and statistics
+    JSON files from the 'data' directory.
     Finally, the user is redirected to the main camera index page.
     """
-    from services.detect import active_cameras
+    from services.detect import active_cameras, discard_stats
+    from services.camera_state import active_cameras_lock
 
     if not session.get('logged_in'):
         return "Unauthorized", 401
 
     username = session['username']
     if delete_user_camera(username, cam_id):
-        if cam_id in active_cameras:
-            active_cameras[cam_id].__del__()
-            del active_cameras[cam_id]
+        with active_cameras_lock:
+            camera = active_cameras.pop(cam_id, None)
+        if camera is not None:
+            camera.close_in_background()
+        discard_stats(cam_id)
         for suffix in ['zones', 'stats']:
             path = f'data/{suffix}_{cam_id}.json'
             if os.path.exists(path):
@@ -2,11 +2,52 @@ from flask import Blueprint, render_template, Response, redirect, url_for, sessi
 import cv2
 from services.detect import VideoCamera
 from services.detect import active_cameras
+from services.camera_state import active_cameras_lock
 from utils.user_camera_utils import get_user_cameras
 
 stream_bp = Blueprint('stream', __name__)
 
 
+def _is_stale(camera):
+    return isinstance(camera.cap, cv2.VideoCapture) and not camera.cap.isOpened()
+
+
+def _get_or_create_camera(cam_id, rtsp_url, replace_stale=False):
+    """
+    Returns the active `VideoCamera` for `cam_id`, creating it if there is none.
+
+    Creating a camera can take a long time (connecting to the stream, loading the model), so it
+    happens outside `active_cameras_lock`. The lock is only taken to look up the current instance
+    and to store the new one. If another request stored a usable camera in the meantime, that one
+    is kept; whichever instance is not kept is closed in the background.
+
+    Args:
+        cam_id (str): The camera identifier.
+        rtsp_url (str): The RTSP URL to open if a new camera is needed.
+        replace_stale (bool, optional): Whether to also replace a camera whose OpenCV capture is no
+                                        longer open. Defaults to False.
+
+    Returns:
+        VideoCamera: The camera stored in `active_cameras`.
+    """
+    with active_cameras_lock:
+        camera = active_cameras.get(cam_id)
+        if camera is not None and not (replace_stale and _is_stale(camera)):
+            return camera
+
+    new_camera = VideoCamera(rtsp_url, cam_id)
+    with active_cameras_lock:
+        current = active_cameras.get(cam_id)
+        if current is None or current is camera or (replace_stale and _is_stale(current)):
+            active_cameras[cam_id] = new_camera
+            loser, winner = current, new_camera
+        else:
+            loser, winner = new_camera, current
+    if loser is not None:
+        loser.close_in_background()
+    return winner
+
+
 @stream_bp.route('/stream/<cam_id>')
 def stream_page(cam_id):
     """
@@ -16,7 +57,8 @@ def stream_page(cam_id):
     It then retrieves the user's camera configurations and checks if the requested `cam_id` is authorized for the current user.
     If the camera is not authorized, it returns a 401 Unauthorized error.
     Finally, it ensures that a `VideoCamera` instance for the specified `cam_id` is active. If not, or if the existing
-    camera's capture is not open, a new `VideoCamera` instance is created and stored in `active_cameras`.
+    camera's capture is not open, the stale instance is closed and a new `VideoCamera` instance is created
+    and stored in `active_cameras` (see `_get_or_create_camera`).
     The function then renders the `stream.html` template, passing the `cam_id` to the template.
     """
     if not session.get('logged_in'):
@@ -29,9 +71,7 @@ def stream_page(cam_id):
         return "Unauthorized", 401
 
     rtsp_url = user_cameras_config[cam_id]['rtsp_url']
-    if cam_id not in active_cameras or \
-       (isinstance(active_cameras[cam_id].cap, cv2.VideoCapture) and not active_cameras[cam_id].cap.isOpened()):
-        active_cameras[cam_id] = VideoCamera(rtsp_url, cam_id)
+    _get_or_create_camera(cam_id, rtsp_url, replace_stale=True)
 
     return render_template('stream.html', cam_id=cam_id)
 
@@ -45,7 +85,7 @@ def video_feed(cam_id):
     It then verifies if the requested `cam_id` is associated with the logged-in user. If the camera
     is not found in the user's configuration, a 401 Unauthorized error is returned.
     If a `VideoCamera` instance for the `cam_id` does not exist in `active_cameras`, it creates a new one
-    using the camera's RTSP URL from the user's configuration.
+    using the camera's RTSP URL from the user's configuration (see `_get_or_create_camera`).
     Finally, it returns a `Response` object that streams the video frames generated by the `VideoCamera` instance
     as a multipart mixed-replace content type, suitable for embedding live video in web pages.
     """
@@ -57,9 +97,7 @@ def video_feed(cam_id):
     if cam_id not in user_cameras_config:
         return "Unauthorized", 401
 
-    if cam_id not in active_cameras:
-        rtsp_url = user_cameras_config[cam_id]['rtsp_url']
-        active_cameras[cam_id] = VideoCamera(rtsp_url, cam_id)
+    camera = _get_or_create_camera(cam_id, user_cameras_config[cam_id]['rtsp_url'])
 
-    return Response(active_cameras[cam_id].generate(),
+    return Response(camera.generate(),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
\ No newline at end of file
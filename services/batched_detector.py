@@ -0,0 +1,209 @@
+import cv2
+from ultralytics import YOLO
+from services.camera_state import active_cameras
+import os
+import numpy as np
+import threading
+
+VEHICLE_CLASS_IDS = {
+    2: 'car',
+    3: 'motorcycle',
+    5: 'bus',
+    7: 'truck',
+}
+DESIRED_CLASS_IDS = tuple(VEHICLE_CLASS_IDS)
+
+BATCH_IDLE_TIMEOUT = 1.0
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '16'))
+INFERENCE_SIZE = 640
+
+PYTORCH_WEIGHTS = 'yolov8n.pt'
+TENSORRT_ENGINE = 'yolov8n.engine'
+OPENVINO_MODEL = 'yolov8n_openvino_model/'
+YOLO_MODEL = os.environ.get('YOLO_MODEL')
+YOLO_AUTO_EXPORT = os.environ.get('YOLO_AUTO_EXPORT') == '1'
+
+_model = None
+_model_lock = threading.Lock()
+_worker_thread = None
+_worker_lock = threading.Lock()
+_frames_available = threading.Event()
+
+
+def _default_model_path(cuda_available):
+    """
+    Picks the model to load when `YOLO_MODEL` is not set.
+
+    With a CUDA device, a TensorRT engine is preferred when present; without one, an OpenVINO
+    export is. The PyTorch weights are used otherwise. An engine found on a machine without CUDA
+    is ignored, since TensorRT cannot load it there.
+
+    Args:
+        cuda_available (bool): Whether PyTorch can use a CUDA device.
+
+    Returns:
+        str: The path of the model to load.
+    """
+    if cuda_available:
+        if os.path.exists(TENSORRT_ENGINE):
+            return TENSORRT_ENGINE
+    elif os.path.isdir(OPENVINO_MODEL):
+        return OPENVINO_MODEL
+    return PYTORCH_WEIGHTS
+
+
+def _export_model(cuda_available):
+    """
+    Exports `PYTORCH_WEIGHTS` for the current machine, with a dynamic batch dimension.
+
+    With a CUDA device this builds an FP16 TensorRT engine. Without one, it builds an INT8
+    OpenVINO model, which Ultralytics runs in throughput mode with asynchronous infer requests
+    when it is given batches. Either way the model accepts batches of up to `MAX_BATCH_SIZE`
+    frames at `INFERENCE_SIZE`, which is what the batch worker sends. Exporting takes a few
+    minutes and only happens once: later starts find the exported model on disk and load it
+    directly.
+
+    Args:
+        cuda_available (bool): Whether PyTorch can use a CUDA device.
+
+    Returns:
+        str: The path of the exported model, or `PYTORCH_WEIGHTS` if the export failed.
+    """
+    try:
+        if cuda_available:
+            return YOLO(PYTORCH_WEIGHTS).export(format='engine', imgsz=INFERENCE_SIZE, half=True, dynamic=True,
+                                                batch=MAX_BATCH_SIZE, device=0)
+        return YOLO(PYTORCH_WEIGHTS).export(format='openvino', imgsz=INFERENCE_SIZE, int8=True, data='coco8.yaml',
+                                            dynamic=True, batch=MAX_BATCH_SIZE)
+    except Exception as e:
+        print(f"Error exporting {PYTORCH_WEIGHTS}: {e}")
+        return PYTORCH_WEIGHTS
+
+
+def get_model():
+    """
+    Returns the YOLO model shared by all cameras, loading it on first use.
+
+    The model is `YOLO_MODEL` if set, and otherwise picked by `_default_model_path`. If
+    `YOLO_AUTO_EXPORT` is enabled and that would be the PyTorch weights, they are first exported
+    with `_export_model`.
+
+    The freshly loaded model runs one prediction on a blank frame, so that the lazy setup done by
+    the first `predict` call (predictor construction, CUDA context and kernel initialization) happens
+    here rather than stalling the first streamed frame.
+
+    Returns:
+        ultralytics.YOLO: The shared detection model.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import torch
+
+                cuda_available = torch.cuda.is_available()
+                model_path = YOLO_MODEL or _default_model_path(cuda_available)
+                if YOLO_AUTO_EXPORT and model_path == PYTORCH_WEIGHTS:
+                    model_path = _export_model(cuda_available)
+                loaded = YOLO(model_path, task='detect')
+                try:
+                    loaded.predict(np.zeros((INFERENCE_SIZE, INFERENCE_SIZE, 3), dtype=np.uint8),
+                                   imgsz=INFERENCE_SIZE, verbose=False)
+                except Exception as e:
+                    print(f"Error warming up model {model_path}: {e}")
+                _model = loaded
+    return _model
+
+
+def notify_frame_available():
+    """
+    Wakes up the batch worker because a camera has published a new frame.
+    """
+    _frames_available.set()
+
+
+def ensure_worker():
+    """
+    Starts the shared batch inference thread if it is not already running.
+    """
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_batch_inference_worker, daemon=True)
+            _worker_thread.start()
+
+
+def _resize_for_inference(frame):
+    """
+    Downscales a frame so that its longer side matches the model's input size.
+
+    Ultralytics letterboxes every input to `INFERENCE_SIZE` anyway; resizing up front keeps
+    the batch small and lets the predictor skip most of its own resize work.
+
+    Args:
+        frame (numpy.ndarray): The full-resolution BGR frame.
+
+    Returns:
+        tuple: A tuple containing:
+            - numpy.ndarray: The frame to run inference on (the input itself if already small enough).
+            - numpy.ndarray: The (sx, sy, sx, sy) factors mapping `xyxy` boxes back to `frame` coordinates.
+    """
+    height, width = frame.shape[:2]
+    ratio = INFERENCE_SIZE / max(height, width)
+    if ratio >= 1:
+        return frame, np.ones(4, dtype=np.float32)
+
+    small_width, small_height = round(width * ratio), round(height * ratio)
+    small = cv2.resize(frame, (small_width, small_height), interpolation=cv2.INTER_LINEAR)
+    sx, sy = width / small_width, height / small_height
+    return small, np.array([sx, sy, sx, sy], dtype=np.float32)
+
+
+def _batch_inference_worker():
+    """
+    Runs YOLO inference for all active cameras in batches on a single shared model.
+
+    Every iteration collects the newest frame from each camera that currently has a viewer,
+    runs `model.predict` over the frames that are due for inference (see
+    `VideoCamera.needs_inference`) in batches of at most `MAX_BATCH_SIZE`, and hands each result
+    back to its camera. The other frames are published with their camera's previous detections.
+    Between iterations the worker blocks until a camera calls `notify_frame_available`, rather than
+    polling the cameras on a timer.
+    """
+    while True:
+        _frames_available.wait(BATCH_IDLE_TIMEOUT)
+        _frames_available.clear()
+
+        batch = []
+        for camera in list(active_cameras.values()):
+            if not camera.has_viewers():
+                continue
+            frame = camera.next_frame(timeout=0)
+            if frame is None:
+                continue
+            if camera.needs_inference(frame):
+                batch.append((camera, frame))
+            else:
+                camera.publish_cached_result(frame)
+
+        for start in range(0, len(batch), MAX_BATCH_SIZE):
+            _run_batch(batch[start:start + MAX_BATCH_SIZE])
+
+
+def _run_batch(batch):
+    """
+    Runs one `model.predict` call over a batch of camera frames and publishes the results.
+
+    Args:
+        batch (list): (camera, frame) pairs, at most `MAX_BATCH_SIZE` long.
+    """
+    inputs = [_resize_for_inference(frame) for _, frame in batch]
+    try:
+        results = get_model().predict(source=[small for small, _ in inputs], conf=0.5, imgsz=INFERENCE_SIZE,
+                                      verbose=False, classes=DESIRED_CLASS_IDS)
+    except Exception as e:
+        print(f"Error running batched inference on {len(batch)} frame(s): {e}")
+        results = [None] * len(batch)
+
+    for (camera, frame), (_, box_scale), result in zip(batch, inputs, results):
+        camera.publish_result(frame, result, box_scale)
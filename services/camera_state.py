@@ -1 +1,5 @@
-active_cameras = {}
\ No newline at end of file
+import threading
+
+active_cameras = {}
+active_cameras_lock = threading.Lock()
+latest_stats = {}
@@ -1,25 +1,125 @@
 import cv2
-from ultralytics import YOLO
-from utils.zones import load_zones, check_point_in_zones
-from services.camera_state import active_cameras
-import json
+from utils.zones import load_zones, prepare_zone_edges, check_points_in_zones
+from services.camera_state import active_cameras, latest_stats
+from services.batched_detector import (
+    VEHICLE_CLASS_IDS, DESIRED_CLASS_IDS, get_model, notify_frame_available, ensure_worker
+)
+from utils.json_utils import dump_json
 import os
 import numpy as np
 import time
 import subprocess
 import threading
+import queue
+import signal
+from collections import deque
+
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbo_jpeg = None
+
+BOX_COLOR = (255, 255, 255)
+LABEL_TEXT_COLOR = (0, 0, 0)
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_FONT_SCALE = 0.6
+LABEL_FONT_THICKNESS = 1
+
+STATS_FLUSH_INTERVAL = 1.0
+READER_IDLE_POLL = 1.0
+IDLE_RELEASE_DELAY = 30.0
+FRAME_POOL_SIZE = 3
+SCENE_THUMB_SIZE = (64, 36)
+SCENE_PIXEL_THRESHOLD = 15
+MJPEG_PART_HEADER = b'\r\n--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+FFMPEG_HWACCEL = os.environ.get('FFMPEG_HWACCEL', 'auto')
+FFMPEG_FRAME_WIDTH, FFMPEG_FRAME_HEIGHT = (int(v) for v in os.environ.get('FFMPEG_FRAME_SIZE', '1280x720').split('x'))
+USE_FFMPEG_SUBPROCESS = os.environ.get('USE_FFMPEG_SUBPROCESS', '1') != '0'
+
+os.makedirs('data', exist_ok=True)
+
+_stats_flush_thread = None
+_stats_lock = threading.Lock()
+_dirty_stats = set()
+
+
+def _stats_flush_worker():
+    """
+    Writes the statistics that changed since the last pass to `data/stats_<cam_id>.json`.
+
+    `generate` only updates `latest_stats` in memory; this thread persists them to each camera's
+    stats file at most once every `STATS_FLUSH_INTERVAL` seconds, with atomic writes so a reader
+    never sees a partially written file. Cameras that have been removed or stopped in the meantime
+    are skipped. Each write happens under `_stats_lock`, so once `discard_stats` has returned no
+    further stats file is written for that camera.
+    """
+    while True:
+        time.sleep(STATS_FLUSH_INTERVAL)
+        with _stats_lock:
+            cam_ids = list(_dirty_stats)
+            _dirty_stats.clear()
+        for cam_id in cam_ids:
+            camera = active_cameras.get(cam_id)
+            if camera is None:
+                continue
+            with _stats_lock:
+                stats_data = latest_stats.get(cam_id)
+                if camera._stopped or stats_data is None:
+                    continue
+                try:
+                    dump_json(camera.stats_file, stats_data, atomic=True)
+                except OSError as e:
+                    print(f"Error writing stats for camera {cam_id}: {e}")
+
+
+def _ensure_stats_flush_worker():
+    """
+    Starts the shared stats flush thread if it is not already running.
+    """
+    global _stats_flush_thread
+    with _stats_lock:
+        if _stats_flush_thread is None or not _stats_flush_thread.is_alive():
+            _stats_flush_thread = threading.Thread(target=_stats_flush_worker, daemon=True)
+            _stats_flush_thread.start()
+
+
+def discard_stats(cam_id):
+    """
+    Drops the in-memory statistics of a removed camera and any pending write of its stats file.
+
+    The camera must already be stopped (see `VideoCamera.close_in_background`), so that neither its
+    viewers nor the flush thread publish or write its statistics again afterwards.
+
+    Args:
+        cam_id (str): The identifier of the removed camera.
+    """
+    with _stats_lock:
+        _dirty_stats.discard(cam_id)
+        latest_stats.pop(cam_id, None)
+
 
 class VideoCamera:
     """
     Manages video capture, object detection, and streaming for a single camera.
 
     This class handles connecting to an RTSP stream (either directly with OpenCV or via FFmpeg
-    subprocess), performing object detection using a YOLOv8 model, identifying vehicles
+    subprocess), running its frames through the YOLOv8 model shared by all cameras, identifying vehicles
     within predefined zones, and generating a live annotated video feed. It also manages
-    reconnection logic and saves detection statistics.
+    reconnection logic and publishes detection statistics.
+
+    Inference itself is driven by the shared batch worker in `services.batched_detector`, through
+    `has_viewers`, `next_frame`, `needs_inference`, `publish_result` and `publish_cached_result`.
+    Apart from `has_viewers`, they are only called from that single worker thread. For each frame
+    taken with `next_frame`, the worker calls `needs_inference` exactly once and then publishes the
+    frame exactly once: with `publish_result` if it ran the model on it, and with
+    `publish_cached_result` otherwise. Ownership of the frame passes back to the camera when it is
+    published.
     """
 
-    def __init__(self, rtsp_url, cam_id, use_subprocess_ffmpeg=True, reconnect_delay=5):
+    def __init__(self, rtsp_url, cam_id, use_subprocess_ffmpeg=USE_FFMPEG_SUBPROCESS, reconnect_delay=5,
+                 jpeg_quality=75, infer_every=3, scene_change_fraction=0.001, max_skipped_inferences=10):
         """
         Initializes the VideoCamera instance.
 
@@ -27,19 +127,54 @@ class VideoCamera:
             rtsp_url (str): The RTSP URL of the camera stream.
             cam_id (str): A unique identifier for the camera.
             use_subprocess_ffmpeg (bool, optional): Whether to use FFmpeg as a subprocess
-                                                     for video capture. Defaults to True.
-            reconnect_delay (int, optional): Delay in seconds before attempting to reconnect.
-                                             Defaults to 5.
+                                                     for video capture rather than OpenCV's
+                                                     `VideoCapture`. Defaults to True unless the
+                                                     `USE_FFMPEG_SUBPROCESS` environment variable
+                                                     is set to `0`.
+            reconnect_delay (int, optional): Delay in seconds before attempting to reconnect after the
+                                             stream failed or ended. Defaults to 5.
+            jpeg_quality (int, optional): JPEG quality (0-100) used when encoding streamed frames.
+                                          Defaults to 75.
+            infer_every (int, optional): Run detection on every n-th frame and reuse the previous
+                                         detections for the frames in between. Defaults to 3.
+            scene_change_fraction (float, optional): Fraction of the pixels of a downscaled grayscale
+                                                     frame that must differ by more than
+                                                     `SCENE_PIXEL_THRESHOLD` from the last frame that went
+                                                     through the model for the scene to count as changed.
+                                                     Below it the previous detections are reused. Set to 0
+                                                     to disable. Defaults to 0.001, i.e. a handful of
+                                                     thumbnail pixels, which a single moving vehicle exceeds.
+            max_skipped_inferences (int, optional): Maximum number of consecutive inference slots
+                                                    skipped because the scene did not change, after
+                                                    which the model runs regardless. Defaults to 10.
         """
         self.rtsp_url = rtsp_url
         self.cam_id = cam_id
         self.use_subprocess_ffmpeg = use_subprocess_ffmpeg
         self.reconnect_delay = reconnect_delay
+        self._jpeg_quality = jpeg_quality
+        self._jpeg_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality, cv2.IMWRITE_JPEG_OPTIMIZE, 0]
+        self._zone_mask_key = None
+        self._zone_mask = None
+        self.infer_every = max(1, infer_every)
+        self._frame_idx = 0
+        self.scene_change_fraction = scene_change_fraction
+        self.max_skipped_inferences = max_skipped_inferences
+        self._last_thumb = None
+        self._skipped_inferences = 0
+        self._last_result = None
+        self._last_box_scale = None
         self.cap = None
         self.ffmpeg_process = None
         self.frame_width = None
         self.frame_height = None
         self.raw_image_size = None
+        self._frame_pool = deque(maxlen=FRAME_POOL_SIZE)
+        self._capture_lock = threading.Lock()
+        self._stopped = False
+        self._closed = False
+        # Load the model before starting FFmpeg: if loading fails, no capture is left behind.
+        self.model = get_model()
         self._initialize_capture()
 
         if not self.cap or (isinstance(self.cap, cv2.VideoCapture) and not self.cap.isOpened()):
@@ -48,18 +183,25 @@ class VideoCamera:
         else:
             self.is_connected = True
 
-        self.model = YOLO('yolov8n.pt')
         self.zones_file = f'data/zones_{cam_id}.json'
         self.stats_file = f'data/stats_{cam_id}.json'
-        os.makedirs('data', exist_ok=True)
-
-        self.vehicle_class_ids = {
-            2: 'car',
-            3: 'motorcycle',
-            5: 'bus',
-            7: 'truck',
-        }
+        self._zones_key = None
+        self._zone_edges = prepare_zone_edges([])
+        self._polygons_np = []
+
+        self.vehicle_class_ids = VEHICLE_CLASS_IDS
+        self._cls_style = {cls_id: (self.model.names[cls_id], BOX_COLOR) for cls_id in self.vehicle_class_ids}
+        self._label_sizes = {}
         self.lock = threading.Lock()
+        self._latest_frame = None
+        self._frame_ready = threading.Event()
+        self._results = queue.Queue(maxsize=1)
+        self._viewers = 0
+        self._viewers_present = threading.Event()
+        self._reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self._reader_thread.start()
+        ensure_worker()
+        _ensure_stats_flush_worker()
 
     def _initialize_capture(self):
         """
@@ -70,20 +212,26 @@ class VideoCamera:
             try:
                 command = [
                     'ffmpeg',
+                    '-hwaccel', FFMPEG_HWACCEL,
+                    '-fflags', 'nobuffer',
+                    '-flags', 'low_delay',
                     '-rtsp_transport', 'tcp',
                     '-i', self.rtsp_url,
-                    '-vf', 'fps=10,scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2',
+                    '-vf', f'fps=10,scale={FFMPEG_FRAME_WIDTH}:{FFMPEG_FRAME_HEIGHT}:force_original_aspect_ratio=decrease,'
+                           f'pad={FFMPEG_FRAME_WIDTH}:{FFMPEG_FRAME_HEIGHT}:(ow-iw)/2:(oh-ih)/2',
                     '-f', 'image2pipe',
                     '-pix_fmt', 'bgr24',
                     '-vcodec', 'rawvideo',
                     '-an',
                     '-'
                 ]
-                self.frame_width = 1280
-                self.frame_height = 720
+                self.frame_width = FFMPEG_FRAME_WIDTH
+                self.frame_height = FFMPEG_FRAME_HEIGHT
                 self.raw_image_size = self.frame_width * self.frame_height * 3
+                self._frame_pool.clear()
 
-                self.ffmpeg_process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=None)
+                self.ffmpeg_process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=None,
+                                                       bufsize=0, start_new_session=True)
                 self.cap = "ffmpeg_subprocess"
             except Exception as e:
                 print(f"Failed to start FFmpeg subprocess for camera {self.cam_id}: {e}")
@@ -108,12 +256,15 @@ class VideoCamera:
                 - numpy.ndarray: The captured frame (BGR format) or None if reading failed.
         """
         if not self.is_connected:
-            print(f"Camera {self.cam_id} not connected, attempting to re-initialize...")
-            self._initialize_capture()
-            if not self.cap or (isinstance(self.cap, cv2.VideoCapture) and not self.cap.isOpened()):
+            with self._capture_lock:
+                if self._stopped:
+                    return False, None
+                print(f"Camera {self.cam_id} not connected, attempting to re-initialize...")
+                self._initialize_capture()
+                connected = self.cap and not (isinstance(self.cap, cv2.VideoCapture) and not self.cap.isOpened())
+            if not connected:
                 self.is_connected = False
-                print(f"Failed to re-initialize capture for camera {self.cam_id}. Waiting {self.reconnect_delay}s...")
-                time.sleep(self.reconnect_delay)
+                print(f"Failed to re-initialize capture for camera {self.cam_id}.")
                 return False, None
             else:
                 self.is_connected = True
@@ -121,29 +272,228 @@ class VideoCamera:
 
         if self.use_subprocess_ffmpeg:
             try:
-                raw_frame = self.ffmpeg_process.stdout.read(self.raw_image_size)
-                if not raw_frame or len(raw_frame) != self.raw_image_size:
+                try:
+                    frame = self._frame_pool.pop()
+                except IndexError:
+                    frame = np.empty((self.frame_height, self.frame_width, 3), dtype=np.uint8)
+                if self._read_raw_frame(frame) != self.raw_image_size:
                     print(f"FFmpeg process for camera {self.cam_id} ended or returned incomplete frame. Reconnecting...")
-                    self._release_capture()
+                    with self._capture_lock:
+                        self._release_capture()
                     self.is_connected = False
                     return False, None
-
-                frame = np.frombuffer(raw_frame, np.uint8).reshape((self.frame_height, self.frame_width, 3))
                 return True, frame
             except Exception as e:
                 print(f"Error reading from FFmpeg pipe for camera {self.cam_id}: {e}. Reconnecting...")
-                self._release_capture()
+                with self._capture_lock:
+                    self._release_capture()
                 self.is_connected = False
                 return False, None
         else:
-            ret, frame = self.cap.read()
+            # close() releases the capture from another thread, so the read must not overlap it.
+            with self._capture_lock:
+                if self._stopped:
+                    return False, None
+                ret, frame = self.cap.read() if self.cap is not None else (False, None)
             if not ret:
                 print(f"Failed to read frame from camera {self.cam_id}. Reconnecting...")
-                self.cap.release()
+                with self._capture_lock:
+                    if self.cap is not None:
+                        self.cap.release()
                 self.is_connected = False
                 return False, None
             return True, frame
 
+    def _read_raw_frame(self, frame):
+        """
+        Fills `frame` with the next raw BGR frame from the FFmpeg pipe.
+
+        The pipe is unbuffered, so each `readinto` copies straight from the pipe into the frame but
+        may return fewer bytes than requested. This keeps reading into the rest of the buffer until
+        the frame is complete or the pipe reaches end of file.
+
+        Args:
+            frame (numpy.ndarray): A contiguous (height, width, 3) uint8 array to read into.
+
+        Returns:
+            int: The number of bytes read, which is less than `raw_image_size` only at end of file.
+        """
+        view = memoryview(frame).cast('B')
+        stdout = self.ffmpeg_process.stdout
+        filled = 0
+        while filled < self.raw_image_size:
+            n = stdout.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        return filled
+
+    def _reader_loop(self):
+        """
+        Continuously reads frames in a background thread and keeps only the most recent one.
+
+        Decoupling capture from inference keeps the RTSP/FFmpeg pipe drained even when detection
+        is slower than the stream's frame rate; frames that are not picked up by `generate`
+        before the next one arrives are simply dropped.
+
+        Frames are only read while the stream has viewers. Once it has had none for
+        `IDLE_RELEASE_DELAY` seconds the capture is released, and it is reconnected when a viewer
+        comes back. After a failed read or reconnection attempt the thread waits `reconnect_delay`
+        seconds, so that a stream that keeps failing (an unreachable host, or FFmpeg exiting right
+        after it started) is not retried in a tight loop.
+        """
+        idle_since = None
+        while not self._stopped:
+            if not self._viewers_present.wait(READER_IDLE_POLL):
+                if idle_since is None:
+                    idle_since = time.monotonic()
+                elif self.is_connected and time.monotonic() - idle_since >= IDLE_RELEASE_DELAY:
+                    print(f"Camera {self.cam_id} has no viewers, releasing its capture.")
+                    with self._capture_lock:
+                        if self._stopped:
+                            break
+                        self._release_capture()
+                    self.is_connected = False
+                continue
+            idle_since = None
+
+            ret, frame = self.read_frame()
+            if not ret:
+                if not self._stopped:
+                    print(f"Retrying camera {self.cam_id} in {self.reconnect_delay}s...")
+                    time.sleep(self.reconnect_delay)
+                continue
+            with self.lock:
+                dropped = self._latest_frame
+                self._latest_frame = frame
+            self._frame_ready.set()
+            notify_frame_available()
+            if dropped is not None:
+                self._recycle_frame(dropped)
+
+    def next_frame(self, timeout=1.0):
+        """
+        Takes the most recent frame published by the reader thread.
+
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait for a new frame.
+                                       Defaults to 1.0.
+
+        Returns:
+            numpy.ndarray: The newest unprocessed frame, or None if no new frame arrived in time.
+        """
+        if not self._frame_ready.wait(timeout):
+            return None
+        with self.lock:
+            frame = self._latest_frame
+            self._latest_frame = None
+            self._frame_ready.clear()
+        return frame
+
+    def has_viewers(self):
+        """
+        Returns whether at least one client is currently consuming this camera's stream.
+        """
+        with self.lock:
+            return self._viewers > 0
+
+    def needs_inference(self, frame):
+        """
+        Advances the frame counter and returns whether `frame` should go through the model.
+
+        Inference runs on every `infer_every`-th frame, and always when no usable previous result exists.
+        On those frames, a small grayscale thumbnail is compared with the one of the last frame that went
+        through the model. The fraction of thumbnail pixels that changed by more than `SCENE_PIXEL_THRESHOLD`
+        is used rather than the mean difference, so that a small moving vehicle, which barely moves the
+        mean, still counts as a change. If the scene has not changed, the previous detections are reused
+        instead, for at most `max_skipped_inferences` consecutive inference slots.
+
+        Args:
+            frame (numpy.ndarray): The full-resolution BGR frame about to be published.
+        """
+        self._frame_idx += 1
+        if self._last_result is not None and self._frame_idx % self.infer_every:
+            return False
+
+        thumb = cv2.cvtColor(cv2.resize(frame, SCENE_THUMB_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        if (self._last_result is not None and self._last_thumb is not None
+                and self._skipped_inferences < self.max_skipped_inferences
+                and np.count_nonzero(cv2.absdiff(thumb, self._last_thumb) > SCENE_PIXEL_THRESHOLD)
+                < self.scene_change_fraction * thumb.size):
+            self._skipped_inferences += 1
+            return False
+
+        self._last_thumb = thumb
+        self._skipped_inferences = 0
+        return True
+
+    def publish_cached_result(self, frame):
+        """
+        Publishes `frame` together with the detections of the last frame that went through the model.
+        """
+        self.publish_result(frame, self._last_result, self._last_box_scale, fresh=False)
+
+    def publish_result(self, frame, result, box_scale, fresh=True):
+        """
+        Hands a frame and its detection result from the batch worker to `generate`.
+
+        Only the newest entry is kept: if the previous one has not been consumed yet it is dropped.
+
+        Args:
+            frame (numpy.ndarray): The full-resolution frame.
+            result: The Ultralytics result for the downscaled `frame`, or None if inference failed.
+            box_scale (numpy.ndarray): The factors mapping the result's `xyxy` boxes back to `frame`.
+            fresh (bool, optional): Whether `result` was computed for this very frame rather than
+                                    reused from an earlier one. Defaults to True.
+        """
+        if fresh:
+            self._last_result = result
+            self._last_box_scale = box_scale
+        item = (frame, result, box_scale, fresh)
+        try:
+            self._results.put_nowait(item)
+        except queue.Full:
+            try:
+                self._recycle_frame(self._results.get_nowait()[0])
+            except queue.Empty:
+                pass
+            self._results.put_nowait(item)
+
+    def _recycle_frame(self, frame):
+        """
+        Returns a frame that is no longer referenced to the pool `read_frame` fills from FFmpeg.
+
+        Every frame has a single owner at a time (the reader, the batch worker, or `generate`),
+        and the owner that drops or finishes with a frame hands its buffer back here, so steady-state
+        reading does not allocate a new BGR array per frame.
+
+        Args:
+            frame (numpy.ndarray): The frame whose buffer can be overwritten by the next read.
+        """
+        if self.use_subprocess_ffmpeg and frame.shape == (self.frame_height, self.frame_width, 3):
+            self._frame_pool.append(frame)
+
+    def _signal_ffmpeg(self, force=False):
+        """
+        Asks the FFmpeg subprocess to exit, or kills it when `force` is set.
+
+        FFmpeg is started in its own session, so on POSIX systems the signal is sent to its whole
+        process group. Elsewhere this falls back to `Popen.terminate()` / `Popen.kill()`.
+
+        Args:
+            force (bool, optional): Whether to kill the process instead of terminating it.
+                                    Defaults to False.
+        """
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(self.ffmpeg_process.pid, signal.SIGKILL if force else signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        elif force:
+            self.ffmpeg_process.kill()
+        else:
+            self.ffmpeg_process.terminate()
+
     def _release_capture(self):
         """
         Releases the video capture resources.
@@ -151,13 +501,15 @@ class VideoCamera:
         if self.use_subprocess_ffmpeg:
             if self.ffmpeg_process is not None:
                 print(f"Terminating FFmpeg process for camera {self.cam_id}...")
-                self.ffmpeg_process.terminate()
+                self._signal_ffmpeg()
                 try:
                     self.ffmpeg_process.wait(timeout=5)
                 except subprocess.TimeoutExpired:
                     if self.ffmpeg_process.poll() is None:
                         print(f"FFmpeg process for camera {self.cam_id} did not terminate, killing it.")
-                        self.ffmpeg_process.kill()
+                        self._signal_ffmpeg(force=True)
+                if self.ffmpeg_process.stdout:
+                    self.ffmpeg_process.stdout.close()
                 self.ffmpeg_process = None
                 print(f"FFmpeg process for camera {self.cam_id} released.")
             else:
@@ -172,126 +524,257 @@ class VideoCamera:
             else:
                 print(f"No OpenCV capture to release for camera {self.cam_id}.")
 
-    def generate(self):
+    def _get_zones(self):
         """
-        Generates a continuous stream of annotated video frames as JPEG bytes.
+        Returns the validated zones for this camera, reloading them only when the zones file changes.
 
-        This method is designed to be used with Flask's `Response` object for streaming.
-        It continuously reads frames, performs object detection, overlays detection
-        and zone information, and then encodes the frame as JPEG.
-        """
-        while True:
-            ret, frame = self.read_frame()
-            if not ret:
-                continue
+        The zones file is only rewritten when the user saves zones from the UI, so the parsed
+        result is cached in memory and invalidated when the file's nanosecond modification time or
+        size changes.
+
+        The zones are packed once into the flat arrays used by the batched zone membership test, and
+        each drawable polygon (three or more vertices) is additionally converted into a contiguous
+        `(N, 1, 2)` int32 array that can be handed straight to `cv2.fillPoly` and `cv2.polylines`.
 
-            zones_data = load_zones(self.zones_file)
+        Returns:
+            tuple: A tuple containing:
+                - ZoneEdges: The packed zones, in zone order.
+                - list: The precomputed int32 point arrays of the drawable zones.
+        """
+        try:
+            st = os.stat(self.zones_file)
+            zones_key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            zones_key = None
 
+        if zones_key != self._zones_key:
             polygons_only = []
-            valid_zones = []
-            for zone in zones_data:
+            polygons_np = []
+            for zone in load_zones(self.zones_file):
                 if isinstance(zone, dict) and 'points' in zone and isinstance(zone['points'], list):
-                    polygons_only.append(zone['points'])
-                    valid_zones.append(zone)
+                    try:
+                        poly = np.asarray(zone['points'], dtype=np.float64).reshape((-1, 2))
+                    except (TypeError, ValueError):
+                        print(f"Warning: Malformed zone points encountered: {zone}. Skipping.")
+                        continue
+                    polygons_only.append(poly)
+                    if len(poly) > 2:
+                        polygons_np.append(poly.astype(np.int32).reshape((-1, 1, 2)))
                 else:
                     print(f"Warning: Malformed zone data encountered: {zone}. Skipping.")
 
-            zones_data = valid_zones
+            self._zone_edges = prepare_zone_edges(polygons_only)
+            self._polygons_np = polygons_np
+            self._zones_key = zones_key
 
-            try:
-                desired_class_ids = list(self.vehicle_class_ids.keys())
-                results = self.model.predict(source=frame, conf=0.5, verbose=False, classes=desired_class_ids)
-
-                total_vehicles = 0
-                vehicle_type_counts = {}
-                zone_vehicle_counts = [{} for _ in range(len(polygons_only))]
+        return self._zone_edges, self._polygons_np
 
-                detections_in_zones = []
+    def _get_zone_mask(self, frame_shape, polygons_np):
+        """
+        Returns the filled zone mask for frames of `frame_shape`, cropped to its bounding box.
 
-                if results and results[0].boxes is not None:
-                    for i, box in enumerate(results[0].boxes.xyxy):
-                        x1, y1, x2, y2 = box.tolist()
-                        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        The mask only depends on the zones and the frame size, so it is rebuilt only when either
+        of them changes rather than being redrawn on every frame.
 
-                        cls_id = int(results[0].boxes.cls[i])
-                        conf = float(results[0].boxes.conf[i])
-                        class_name = self.model.names[cls_id]
+        Args:
+            frame_shape (tuple): The shape of the frames being annotated.
+            polygons_np (list): The precomputed int32 point arrays of the drawable zones.
 
-                        zone_idx = check_point_in_zones((cx, cy), polygons_only)
+        Returns:
+            tuple: A tuple containing:
+                - tuple: The (x, y, w, h) bounding box of all zones within the frame.
+                - numpy.ndarray: An (h, w, 1) bool array that is True inside any zone, or None if
+                                 no zone covers any pixel of the frame.
+        """
+        mask_key = (self._zones_key, frame_shape[:2])
+        if mask_key != self._zone_mask_key:
+            mask = np.zeros(frame_shape[:2], dtype=np.uint8)
+            for pts in polygons_np:
+                cv2.fillPoly(mask, [pts], 255)
+            x, y, w, h = cv2.boundingRect(mask)
+            crop = mask[y:y + h, x:x + w, None] > 0 if w and h else None
+            self._zone_mask = ((x, y, w, h), crop)
+            self._zone_mask_key = mask_key
+        return self._zone_mask
 
-                        if cls_id in self.vehicle_class_ids and zone_idx != -1:
-                            total_vehicles += 1
-                            vehicle_type_counts[class_name] = vehicle_type_counts.get(class_name, 0) + 1
+    def generate(self):
+        """
+        Generates a continuous stream of annotated video frames as JPEG bytes.
 
-                            if zone_idx < len(zone_vehicle_counts):
-                                zone_vehicle_counts[zone_idx][class_name] = zone_vehicle_counts[zone_idx].get(class_name, 0) + 1
+        This method is designed to be used with Flask's `Response` object for streaming.
+        It continuously takes the latest frame and its detections produced by the shared batch
+        inference worker, overlays detection and zone information, and then encodes the frame as JPEG.
+        """
+        with self.lock:
+            self._viewers += 1
+            self._viewers_present.set()
+        try:
+            yield from self._generate_frames()
+        finally:
+            with self.lock:
+                self._viewers -= 1
+                if not self._viewers:
+                    self._viewers_present.clear()
+
+    def _generate_frames(self):
+        """
+        Produces the multipart JPEG chunks for `generate`.
 
-                            detections_in_zones.append({
-                                'box': [x1, y1, x2, y2],
-                                'class_name': class_name,
-                                'confidence': conf
-                            })
+        Each viewer runs its own generator, so the scratch buffer for the zone overlay belongs to the
+        generator rather than to the camera. The stream ends once the camera has been closed.
+        """
+        overlay_buf = None
+        while not self._stopped:
+            try:
+                frame, result, box_scale, fresh = self._results.get(timeout=1.0)
+            except queue.Empty:
+                continue
 
-                stats_data = {
-                    "total_vehicles": total_vehicles,
-                    "vehicle_type_counts": vehicle_type_counts,
-                    "zone_vehicle_counts": zone_vehicle_counts
-                }
+            if result is None:
+                yield from self._mjpeg_part(frame)
+                self._recycle_frame(frame)
+                continue
 
-                with open(self.stats_file, 'w') as f:
-                    json.dump(stats_data, f)
+            zone_edges, polygons_np = self._get_zones()
 
-                annotated_frame = frame.copy()
+            try:
+                total_vehicles = 0
+                vehicle_type_counts = {}
+                zone_vehicle_counts = [{} for _ in range(zone_edges.num_zones)]
 
-                for det in detections_in_zones:
-                    x1, y1, x2, y2 = [int(coord) for coord in det['box']]
-                    class_name = det['class_name']
-                    confidence = det['confidence']
+                detections_in_zones = []
 
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (255, 255, 255), 2)
+                boxes = result.boxes
+                if boxes is not None and len(boxes):
+                    xyxy = boxes.xyxy.cpu().numpy() * box_scale
+                    cls = boxes.cls.cpu().numpy().astype(np.int32)
+                    conf = boxes.conf.cpu().numpy()
+                    centroids = (xyxy[:, :2] + xyxy[:, 2:]) * 0.5
+
+                    zone_idx = check_points_in_zones(centroids, zone_edges)
+                    in_zone = (zone_idx != -1) & np.isin(cls, DESIRED_CLASS_IDS)
+
+                    total_vehicles = int(np.count_nonzero(in_zone))
+                    for cls_id, count in zip(*np.unique(cls[in_zone], return_counts=True)):
+                        vehicle_type_counts[self.model.names[int(cls_id)]] = int(count)
+
+                    if total_vehicles:
+                        pairs, counts = np.unique(np.stack((zone_idx[in_zone], cls[in_zone]), axis=1),
+                                                  axis=0, return_counts=True)
+                        for (z, cls_id), count in zip(pairs.tolist(), counts.tolist()):
+                            zone_vehicle_counts[z][self.model.names[cls_id]] = count
+
+                    boxes_in_zones = xyxy[in_zone].astype(np.int32)
+                    detections_in_zones = list(zip(boxes_in_zones.tolist(),
+                                                   cls[in_zone].tolist(), conf[in_zone].tolist()))
+
+                if fresh:
+                    with _stats_lock:
+                        if not self._stopped:
+                            latest_stats[self.cam_id] = {
+                                "total_vehicles": total_vehicles,
+                                "vehicle_type_counts": vehicle_type_counts,
+                                "zone_vehicle_counts": zone_vehicle_counts
+                            }
+                            _dirty_stats.add(self.cam_id)
+
+                annotated_frame = frame
+
+                if detections_in_zones:
+                    corners = boxes_in_zones[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape((-1, 4, 2))
+                    cv2.polylines(annotated_frame, list(corners), True, BOX_COLOR, 2)
+
+                for (x1, y1, x2, y2), cls_id, confidence in detections_in_zones:
+                    class_name, color = self._cls_style[cls_id]
 
                     label = f'{class_name} {confidence:.2f}'
 
-                    font = cv2.FONT_HERSHEY_SIMPLEX
-                    font_scale = 0.6
-                    font_thickness = 1
-                    text_size = cv2.getTextSize(label, font, font_scale, font_thickness)[0]
+                    text_size = self._label_sizes.get(label)
+                    if text_size is None:
+                        text_size = cv2.getTextSize(label, LABEL_FONT, LABEL_FONT_SCALE, LABEL_FONT_THICKNESS)[0]
+                        self._label_sizes[label] = text_size
                     text_x = x1
                     text_y = y1 - 10 if y1 - 10 > text_size[1] else y1 + text_size[1] + 10
 
                     cv2.rectangle(annotated_frame, (text_x, text_y - text_size[1] - 2),
-                                    (text_x + text_size[0] + 2, text_y + 2), (255, 255, 255), -1)
+                                    (text_x + text_size[0] + 2, text_y + 2), color, -1)
 
                     cv2.putText(annotated_frame, label, (text_x, text_y),
-                                    font, font_scale, (0, 0, 0), font_thickness, cv2.LINE_AA)
+                                    LABEL_FONT, LABEL_FONT_SCALE, LABEL_TEXT_COLOR, LABEL_FONT_THICKNESS, cv2.LINE_AA)
 
-                overlay = annotated_frame.copy()
-                alpha = 0.2
+                if polygons_np:
+                    alpha = 0.2
+                    (x, y, w, h), zone_mask = self._get_zone_mask(annotated_frame.shape, polygons_np)
+                    if zone_mask is not None:
+                        roi = annotated_frame[y:y + h, x:x + w]
+                        if overlay_buf is None or overlay_buf.shape != roi.shape:
+                            overlay_buf = np.empty_like(roi)
+                        cv2.convertScaleAbs(roi, dst=overlay_buf, alpha=1 - alpha, beta=alpha * 255)
+                        np.copyto(roi, overlay_buf, where=zone_mask)
 
-                for i, zone in enumerate(zones_data):
-                    poly = zone['points']
-                    if not poly:
-                        continue
-                    pts = np.array([(int(x), int(y)) for x, y in poly], np.int32)
-                    pts = pts.reshape((-1, 1, 2))
+                    cv2.polylines(annotated_frame, polygons_np, True, (255, 255, 255), 2)
 
-                    if len(pts) > 2:
-                        cv2.fillPoly(overlay, [pts], (255, 255, 255))
-                        cv2.polylines(annotated_frame, [pts], True, (255, 255, 255), 2)
-
-                annotated = cv2.addWeighted(overlay, alpha, annotated_frame, 1 - alpha, 0)
-
-                _, jpeg = cv2.imencode('.jpg', annotated)
-                yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
+                yield from self._mjpeg_part(annotated_frame)
+                self._recycle_frame(frame)
 
             except Exception as e:
                 print(f"Error processing frame in VideoCamera: {e}")
-                _, jpeg = cv2.imencode('.jpg', frame)
-                yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
+                yield from self._mjpeg_part(frame)
+                self._recycle_frame(frame)
                 continue
 
-    def __del__(self):
+    def _mjpeg_part(self, image):
+        """
+        Encodes `image` as JPEG and yields it as one part of the multipart MJPEG stream.
+
+        The part header and the JPEG bytes are yielded as two separate chunks rather than being
+        concatenated into a new buffer. The CRLF that ends the previous part is sent as the start
+        of the next part's header instead.
+
+        When PyTurboJPEG and libjpeg-turbo are installed the frame is encoded through TurboJPEG
+        directly, which returns `bytes` without an extra copy; otherwise `cv2.imencode` is used.
+
+        Args:
+            image (numpy.ndarray): The BGR frame to send.
+        """
+        if _turbo_jpeg is not None:
+            data = _turbo_jpeg.encode(image, quality=self._jpeg_quality, jpeg_subsample=TJSAMP_420)
+        else:
+            _, jpeg = cv2.imencode('.jpg', image, self._jpeg_params)
+            data = jpeg.tobytes()
+        yield MJPEG_PART_HEADER
+        yield data
+
+    def close(self):
+        """
+        Stops the reader thread and releases the video capture resources.
+
+        Route handlers call this (through `close_in_background`) when a camera is removed or
+        replaced, and the application calls it for all active cameras at exit, so FFmpeg
+        subprocesses do not depend on garbage collection to be terminated. Calling it more than
+        once is harmless: only the first call releases the capture.
         """
-        Destructor to ensure capture resources are released when the object is deleted.
+        self._stopped = True
+        with self._capture_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._release_capture()
+
+    def close_in_background(self):
         """
-        self._release_capture()
\ No newline at end of file
+        Stops the camera and runs `close` in a separate thread, returning immediately.
+
+        Releasing the capture may wait several seconds for FFmpeg to exit, which should not hold
+        up the HTTP request that removed the camera. The camera is marked as stopped before this
+        returns, though, so it no longer publishes statistics from then on. The thread is not a
+        daemon, so the interpreter still waits for the FFmpeg process to be released before exiting.
+        """
+        self._stopped = True
+        threading.Thread(target=self.close).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from routes.auth_routes import _HASH_PATTERN, _verify_password
+from utils import user_camera_utils
+from utils.user_camera_utils import load_users, save_users
+
+
+class HashPatternTests(unittest.TestCase):
+    def test_recognises_werkzeug_hashes(self):
+        for method in ('scrypt', 'pbkdf2', 'pbkdf2:sha256', 'pbkdf2:sha256:5000'):
+            with self.subTest(method=method):
+                self.assertIsNotNone(_HASH_PATTERN.fullmatch(generate_password_hash('secret', method=method)))
+
+    def test_rejects_plaintext_with_hash_prefix(self):
+        for password in ('scrypt:hunter2', 'pbkdf2:sha256:hunter2', 'scrypt:1:2:3$salt', 'plain'):
+            with self.subTest(password=password):
+                self.assertIsNone(_HASH_PATTERN.fullmatch(password))
+
+
+class VerifyPasswordTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for patcher in (mock.patch.object(user_camera_utils, 'USERS_FILE', os.path.join(directory.name, 'users.json')),
+                        mock.patch.object(user_camera_utils, '_users_cache', {'data': None, 'key': None})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _verify(self, username, password):
+        return _verify_password(load_users(), username, password)
+
+    def test_hashed_password(self):
+        save_users({'alice': {'password': generate_password_hash('secret')}})
+        self.assertTrue(self._verify('alice', 'secret'))
+        self.assertFalse(self._verify('alice', 'wrong'))
+
+    def test_unknown_user_is_rejected(self):
+        save_users({'alice': {'password': generate_password_hash('secret')}})
+        self.assertFalse(self._verify('bob', 'secret'))
+        self.assertFalse(self._verify('bob', ''))
+
+    def test_legacy_plaintext_with_hash_prefix_logs_in(self):
+        save_users({'alice': {'password': 'scrypt:hunter2'}})
+        self.assertTrue(self._verify('alice', 'scrypt:hunter2'))
+
+    def test_legacy_plaintext_is_upgraded_after_login(self):
+        save_users({'alice': {'password': 'secret'}})
+        self.assertFalse(self._verify('alice', 'wrong'))
+        self.assertEqual(load_users()['alice']['password'], 'secret')
+
+        self.assertTrue(self._verify('alice', 'secret'))
+        stored = load_users()['alice']['password']
+        self.assertIsNotNone(_HASH_PATTERN.fullmatch(stored))
+        self.assertTrue(check_password_hash(stored, 'secret'))
+        self.assertTrue(self._verify('alice', 'secret'))
+
+    def test_upgrade_keeps_users_added_after_the_read(self):
+        save_users({'alice': {'password': 'secret'}})
+        users = load_users()
+        save_users({**users, 'bob': {'password': generate_password_hash('other')}})
+
+        self.assertTrue(_verify_password(users, 'alice', 'secret'))
+        self.assertEqual(set(load_users()), {'alice', 'bob'})
+
+
+if __name__ == '__main__':
+    unittest.main()
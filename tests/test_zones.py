@@ -0,0 +1,89 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from utils import zones
+from utils.zones import check_point_in_zones, check_points_in_zones, prepare_zone_edges
+
+
+def _reference(points, polygons):
+    return np.array([check_point_in_zones(tuple(point), polygons) for point in points], dtype=np.int32)
+
+
+def _random_polygons(rng, max_zones=5, max_vertices=8, extent=50):
+    # Integer coordinates on a small grid, so that points regularly land on vertices and edges.
+    return [[tuple(vertex) for vertex in rng.integers(0, extent, (rng.integers(1, max_vertices + 1), 2)).astype(float)]
+            for _ in range(rng.integers(0, max_zones + 1))]
+
+
+class CheckPointsInZonesTests:
+    """
+    Compares `check_points_in_zones` with the scalar `check_point_in_zones` it replaces.
+
+    Mixed into one `TestCase` per implementation: `setUp` selects the NumPy or the Numba path.
+    """
+
+    def test_matches_scalar_reference_on_random_zones(self):
+        rng = np.random.default_rng(0)
+        for _ in range(300):
+            polygons = _random_polygons(rng)
+            points = rng.integers(0, 50, (rng.integers(0, 40), 2)).astype(float)
+            np.testing.assert_array_equal(check_points_in_zones(points, prepare_zone_edges(polygons)),
+                                          _reference(points, polygons))
+
+    def test_matches_scalar_reference_on_vertices_and_edges(self):
+        rng = np.random.default_rng(1)
+        for _ in range(100):
+            polygons = _random_polygons(rng)
+            vertices = [vertex for polygon in polygons for vertex in polygon]
+            if not vertices:
+                continue
+            vertices = np.array(vertices)
+            midpoints = (vertices + np.roll(vertices, -1, axis=0)) / 2
+            points = np.vstack((vertices, midpoints))
+            np.testing.assert_array_equal(check_points_in_zones(points, prepare_zone_edges(polygons)),
+                                          _reference(points, polygons))
+
+    def test_first_containing_zone_wins(self):
+        square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+        inner = [(2, 2), (8, 2), (8, 8), (2, 8)]
+        points = np.array([[5.0, 5.0], [1.0, 1.0], [20.0, 20.0]])
+        np.testing.assert_array_equal(check_points_in_zones(points, prepare_zone_edges([square, inner])), [0, 0, -1])
+        np.testing.assert_array_equal(check_points_in_zones(points, prepare_zone_edges([inner, square])), [0, 1, -1])
+
+    def test_polygons_with_fewer_than_three_vertices_keep_their_indices(self):
+        square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+        polygons = [[(5, 5)], [(0, 0), (10, 10)], [], square]
+        zone_edges = prepare_zone_edges(polygons)
+        self.assertEqual(zone_edges.num_zones, 4)
+        points = np.array([[5.0, 5.0], [0.0, 0.0], [15.0, 5.0]])
+        np.testing.assert_array_equal(check_points_in_zones(points, zone_edges), [3, -1, -1])
+        np.testing.assert_array_equal(check_points_in_zones(points, zone_edges), _reference(points, polygons))
+
+    def test_no_zones(self):
+        points = np.array([[1.0, 2.0], [3.0, 4.0]])
+        for polygons in ([], [[(1, 1)], [(0, 0), (5, 5)]]):
+            np.testing.assert_array_equal(check_points_in_zones(points, prepare_zone_edges(polygons)), [-1, -1])
+
+    def test_no_points(self):
+        square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+        result = check_points_in_zones(np.empty((0, 2)), prepare_zone_edges([square]))
+        self.assertEqual(result.shape, (0,))
+        self.assertEqual(result.dtype, np.int32)
+
+
+class NumPyCheckPointsInZonesTests(CheckPointsInZonesTests, unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(zones, 'points_in_zones', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@unittest.skipIf(zones.points_in_zones is None, 'Numba is not installed')
+class NumbaCheckPointsInZonesTests(CheckPointsInZonesTests, unittest.TestCase):
+    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import threading
+import orjson
+
+
+def load_json(path):
+    """
+    Reads and parses a JSON file using orjson.
+
+    Args:
+        path (str): The path to the JSON file.
+
+    Returns:
+        The parsed JSON document.
+
+    Raises:
+        OSError: If the file cannot be opened.
+        orjson.JSONDecodeError: If the file does not contain valid JSON.
+    """
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def dump_json(path, data, indent=False, atomic=False):
+    """
+    Serializes `data` with orjson and writes it to `path`.
+
+    The payload is fully serialized before the file is opened and is written with a
+    single `write` call, so a serialization error never leaves a truncated file behind.
+
+    Args:
+        path (str): The destination file path.
+        data: The JSON-serializable object to write.
+        indent (bool, optional): Whether to pretty-print with a two-space indent.
+                                 Defaults to False.
+        atomic (bool, optional): Whether to write to a temporary file and `os.replace` it
+                                 over `path`, so concurrent readers never observe a
+                                 partially written file. The temporary file name is unique
+                                 per thread, so concurrent writers never share it.
+                                 Defaults to False.
+    """
+    option = orjson.OPT_INDENT_2 if indent else 0
+    payload = orjson.dumps(data, option=option)
+    target = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp' if atomic else path
+    with open(target, 'wb') as f:
+        f.write(payload)
+    if atomic:
+        os.replace(target, path)
@@ -1,38 +1,84 @@
-import json
+import copy
 import os
+import threading
+from utils.json_utils import load_json, dump_json
 
 USERS_FILE = 'data/users.json'
 CAMERAS_FILE = 'data/cameras.json'
 
-def load_users():
-    os.makedirs('data', exist_ok=True)
-    if os.path.exists(USERS_FILE):
+# Keyed on (st_mtime_ns, st_size) rather than st_mtime alone, like the zones cache: with coarse
+# timestamps, two writes within the same tick would otherwise go unnoticed.
+_users_cache = {'data': None, 'key': None}
+_cameras_cache = {'data': None, 'key': None}
+_cache_lock = threading.Lock()
+
+os.makedirs('data', exist_ok=True)
+
+def _read_cached(path, cache):
+    # Expects `_cache_lock` to be held; the result is the cached dict itself.
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    key = (st.st_mtime_ns, st.st_size)
+    if cache['data'] is None or cache['key'] != key:
         try:
-            with open(USERS_FILE, 'r') as f:
-                return json.load(f)
+            data = load_json(path)
         except Exception:
             return {}
-    return {}
+        cache['data'] = data
+        cache['key'] = key
+    return cache['data']
+
+def _write_cached(path, cache, data):
+    # Expects `_cache_lock` to be held.
+    dump_json(path, data, atomic=True)
+    cache['data'] = copy.deepcopy(data)
+    st = os.stat(path)
+    cache['key'] = (st.st_mtime_ns, st.st_size)
+
+def _load_cached(path, cache):
+    # Callers modify what they get back, so they get a copy rather than the cached dict itself.
+    with _cache_lock:
+        return copy.deepcopy(_read_cached(path, cache))
+
+def _save_cached(path, cache, data):
+    with _cache_lock:
+        _write_cached(path, cache, data)
+
+def _update_cached(path, cache, update):
+    # Reads, modifies and writes the file under one lock, so concurrent updates are not lost.
+    with _cache_lock:
+        data = copy.deepcopy(_read_cached(path, cache))
+        changed = update(data)
+        if changed:
+            _write_cached(path, cache, data)
+        return changed
+
+def load_users():
+    return _load_cached(USERS_FILE, _users_cache)
 
 def save_users(users):
-    os.makedirs('data', exist_ok=True)
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=4)
+    _save_cached(USERS_FILE, _users_cache, users)
+
+def update_users(update):
+    """
+    Applies `update` to the current users and saves them, without losing concurrent changes.
+
+    Args:
+        update (callable): Called with the users dict, which it may modify in place. It returns
+                           True if it changed anything, in which case the users are saved.
+
+    Returns:
+        bool: What `update` returned.
+    """
+    return _update_cached(USERS_FILE, _users_cache, update)
 
 def load_all_cameras_config():
-    os.makedirs('data', exist_ok=True)
-    if os.path.exists(CAMERAS_FILE):
-        try:
-            with open(CAMERAS_FILE, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    return _load_cached(CAMERAS_FILE, _cameras_cache)
 
 def save_all_cameras_config(all_cameras_config):
-    os.makedirs('data', exist_ok=True)
-    with open(CAMERAS_FILE, 'w') as f:
-        json.dump(all_cameras_config, f, indent=4)
+    _save_cached(CAMERAS_FILE, _cameras_cache, all_cameras_config)
 
 def get_user_cameras(username):
     all_cameras = load_all_cameras_config()
@@ -1,5 +1,11 @@
-import json
 import os
+from collections import namedtuple
+import numpy as np
+import orjson
+from utils.json_utils import load_json
+from utils.zones_kernels import points_in_zones
+
+ZoneEdges = namedtuple('ZoneEdges', ['num_zones', 'verts', 'offsets', 'zone_ids', 'edges', 'edge_offsets'])
 
 def load_zones(zones_file):
     """
@@ -18,10 +24,9 @@ def load_zones(zones_file):
     """
     if os.path.exists(zones_file):
         try:
-            with open(zones_file, 'r') as f:
-                data = json.load(f)
-                return data.get('zones', []) if isinstance(data.get('zones'), list) else []
-        except (json.JSONDecodeError, IOError) as e:
+            data = load_json(zones_file)
+            return data.get('zones', []) if isinstance(data.get('zones'), list) else []
+        except (orjson.JSONDecodeError, IOError) as e:
             print(f"Error loading zones from {zones_file}: {e}")
             return []
     return []
@@ -82,4 +87,92 @@ def check_point_in_zones(point, zones_polygons_only):
     for i, polygon in enumerate(zones_polygons_only):
         if point_in_polygon(point, polygon):
             return i
-    return -1
\ No newline at end of file
+    return -1
+
+
+def prepare_zone_edges(zones_polygons):
+    """
+    Packs the zone polygons into the flat arrays that `check_points_in_zones` tests points against.
+
+    Zones change far less often than they are queried, so they are converted once into a
+    CSR-style layout: the vertices of all zones live in one contiguous `(V, 2)` float64 array, and
+    an offsets array gives each zone's slice of it. Each zone's vertex run is closed (its first
+    vertex is repeated at the end), so the edges of zone `k` are simply consecutive vertex pairs
+    within its slice. The edge endpoints, their bounds and the slope terms of the ray casting test
+    are derived from the same layout once, for the NumPy implementation.
+
+    Polygons with fewer than three vertices cannot contain any point and are left out of the
+    arrays; `zone_ids` maps each packed zone back to its index in `zones_polygons`.
+
+    Args:
+        zones_polygons (list): A list of polygons, one per zone, each given as a sequence of
+                               (px, py) vertex coordinates.
+
+    Returns:
+        ZoneEdges: The packed zones. `num_zones` is `len(zones_polygons)`; `verts`, `offsets` and
+                   `zone_ids` hold the closed vertex runs of the valid zones; `edges` holds the
+                   `(min_y, max_y, max_x, p1x, p1y, dx, dy, vertical)` arrays of all their edges,
+                   with the edges of packed zone `k` starting at `edge_offsets[k]`.
+    """
+    closed = []
+    zone_ids = []
+    for i, polygon in enumerate(zones_polygons):
+        polygon = np.asarray(polygon, dtype=np.float64).reshape((-1, 2))
+        if len(polygon) < 3:
+            continue
+        closed.append(np.vstack((polygon, polygon[:1])))
+        zone_ids.append(i)
+
+    lengths = np.array([len(polygon) for polygon in closed], dtype=np.int64)
+    offsets = np.zeros(len(closed) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    verts = np.ascontiguousarray(np.concatenate(closed) if closed else np.empty((0, 2)), dtype=np.float64)
+
+    is_edge = np.ones(max(len(verts) - 1, 0), dtype=np.bool_)
+    is_edge[offsets[1:-1] - 1] = False
+    p1x, p1y = verts[:-1, 0][is_edge], verts[:-1, 1][is_edge]
+    p2x, p2y = verts[1:, 0][is_edge], verts[1:, 1][is_edge]
+    dy = p2y - p1y
+    edges = (np.minimum(p1y, p2y), np.maximum(p1y, p2y), np.maximum(p1x, p2x),
+             p1x, p1y, p2x - p1x, np.where(dy != 0, dy, 1), p1x == p2x)
+
+    return ZoneEdges(len(zones_polygons), verts, offsets, np.array(zone_ids, dtype=np.int32),
+                     edges, offsets[:-1] - np.arange(len(closed)))
+
+
+def check_points_in_zones(points, zone_edges):
+    """
+    Finds the zone containing each point of a batch, testing all points against all zones at once.
+
+    This is the vectorized counterpart of `check_point_in_zones`. It applies the same ray casting
+    rule, but evaluates every (point, polygon edge) pair of every zone as a single NumPy
+    expression, and reduces the edge crossings to a per-zone parity with one `reduceat` call.
+    When Numba is installed, the compiled kernel in `utils.zones_kernels` is used instead: it walks
+    the packed vertex array directly, in parallel over points, and stops at each point's first zone.
+
+    Args:
+        points (numpy.ndarray): An (M, 2) array of (x, y) coordinates to check.
+        zone_edges (ZoneEdges): The packed zones built by `prepare_zone_edges`.
+
+    Returns:
+        numpy.ndarray: An (M,) int32 array with, for each point, the index of the first zone that
+                       contains it, or -1 if the point is not within any zone.
+    """
+    points = np.ascontiguousarray(points, dtype=np.float64).reshape((-1, 2))
+    zone_idx = np.full(len(points), -1, dtype=np.int32)
+    if not len(points) or not len(zone_edges.zone_ids):
+        return zone_idx
+
+    if points_in_zones is not None:
+        points_in_zones(points, zone_edges.verts, zone_edges.offsets, zone_edges.zone_ids, zone_idx)
+        return zone_idx
+
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    min_y, max_y, max_x, p1x, p1y, dx, dy, vertical = zone_edges.edges
+    xinters = (y - p1y) * dx / dy + p1x
+    crosses = (y > min_y) & (y <= max_y) & (x <= max_x) & (vertical | (x <= xinters))
+    inside = np.logical_xor.reduceat(crosses, zone_edges.edge_offsets, axis=1)
+    hit = inside.any(axis=1)
+    zone_idx[hit] = zone_edges.zone_ids[inside[hit].argmax(axis=1)]
+    return zone_idx
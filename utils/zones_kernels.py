@@ -0,0 +1,79 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+def _point_in_ring(verts, start, end, x, y):
+    """
+    Ray casting point-in-polygon test for a single point, written for Numba's nopython mode.
+
+    This is the same rule as `utils.zones.check_point_in_zones`, expressed as a plain loop over
+    a contiguous float64 array so that Numba can compile it to native code.
+
+    Args:
+        verts (numpy.ndarray): A (V, 2) float64 array of polygon vertices.
+        start (int): The index of the polygon's first vertex in `verts`.
+        end (int): One past the index of the polygon's last vertex. The first vertex is repeated
+                   at `end - 1`, so that edge `i` is simply `verts[i] -> verts[i + 1]`.
+        x (float): The x coordinate of the point to check.
+        y (float): The y coordinate of the point to check.
+
+    Returns:
+        bool: True if the point is inside the polygon, False otherwise.
+    """
+    inside = False
+    for i in range(start, end - 1):
+        p1x = verts[i, 0]
+        p1y = verts[i, 1]
+        p2x = verts[i + 1, 0]
+        p2y = verts[i + 1, 1]
+        if y > min(p1y, p2y) and y <= max(p1y, p2y) and x <= max(p1x, p2x):
+            if p1y != p2y:
+                xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+            else:
+                xinters = p1x
+            if p1x == p2x or x <= xinters:
+                inside = not inside
+    return inside
+
+
+if njit is not None:
+    _point_in_ring = njit(cache=True)(_point_in_ring)
+
+
+def _points_in_zones(points_xy, verts, offsets, zone_ids, out_idx):
+    """
+    Finds the first zone containing each point of a batch, in one pass over all points and zones.
+
+    Points are independent of each other, so the outer loop runs in parallel when compiled with
+    `parallel=True`; each point stops at the first zone that contains it.
+
+    Args:
+        points_xy (numpy.ndarray): An (M, 2) float64 array of (x, y) coordinates to check.
+        verts (numpy.ndarray): The (V, 2) float64 closed vertex runs of all zones.
+        offsets (numpy.ndarray): A (K + 1,) int64 array; zone `k` occupies
+                                 `verts[offsets[k]:offsets[k + 1]]`.
+        zone_ids (numpy.ndarray): A (K,) int32 array with the index reported for each zone.
+        out_idx (numpy.ndarray): An (M,) int32 array that receives, for each point, the index of
+                                 the first zone containing it, or -1.
+    """
+    for k in prange(points_xy.shape[0]):
+        x = points_xy[k, 0]
+        y = points_xy[k, 1]
+        out_idx[k] = -1
+        for z in range(zone_ids.shape[0]):
+            if _point_in_ring(verts, offsets[z], offsets[z + 1], x, y):
+                out_idx[k] = zone_ids[z]
+                break
+
+
+if njit is not None:
+    points_in_zones = njit(cache=True, parallel=True)(_points_in_zones)
+    points_in_zones(np.zeros((1, 2)), np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]),
+                    np.array([0, 4], dtype=np.int64), np.zeros(1, dtype=np.int32), np.zeros(1, dtype=np.int32))
+else:
+    points_in_zones = None